@@ -7,25 +7,130 @@
 #
 # Usage: sudo python3 monitor-cellular.py [options]
 #
+# Needs root, or CAP_NET_RAW (e.g. AmbientCapabilities=CAP_NET_RAW in a systemd
+# unit), to open the raw ICMP socket.
+#
 # Options:
 #   --host HOST           Remote host to ping (default: 8.8.8.8)
 #   --interval SECONDS    Ping interval in seconds (default: 10)
 #   --timeout SECONDS     Ping timeout in seconds (default: 5)
 #   --interface IFACE     Network interface to use (default: wwan0)
 #   --duration MINUTES    Run for N minutes (default: 0 = infinite)
+#   --stats-window N      Recent pings/failures kept for statistics (default: 100, 0 = off)
 #
 
 import subprocess
 import time
 import sys
+import os
 import argparse
+import array
+import json
+import re
 import socket
-from datetime import datetime, timedelta
-from collections import deque
+import selectors
+import struct
+import threading
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+IFF_UP = 0x1
+RT_TABLE_MAIN = 254
+DNS_CACHE_TTL = 300
+SIGNAL_CACHE_TTL = 15
+SIGNAL_OUTAGE_EVERY = 5
+
+# Patterns for pulling signal quality out of `mmcli --output-keyvalue` and `gdbus monitor`
+_SIGQ_RE = re.compile(rb"signal-quality\.value\s*:\s*(\d+)")
+_SIGQ_PUSH_RE = re.compile(rb"'SignalQuality': <\(uint32 (\d+), (true|false)\)>")
+_MODEM_REMOVED_RE = re.compile(rb"InterfacesRemoved \(objectpath '/org/freedesktop/ModemManager1/Modem/")
+_MM_NO_OWNER = b"org.freedesktop.ModemManager1 does not have an owner"
+
+
+# The echo request is a bare 8-byte header: four 16-bit words
+_ICMP_HEADER_WORDS = struct.Struct("!4H")
+
+
+def icmp_checksum(header):
+    """Compute the 16-bit one's-complement Internet checksum of an ICMP echo header"""
+    total = sum(_ICMP_HEADER_WORDS.unpack(header))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+class RttWindow:
+    """Fixed-size ring buffer of recent RTTs with a running sum and rolling min/max"""
+    
+    __slots__ = ("size", "_buf", "_n", "_pos", "_sum", "_seq", "_min_dq", "_max_dq")
+    
+    def __init__(self, size):
+        self.size = size
+        self._buf = array.array('f', [0.0]) * size
+        self._n = 0
+        self._pos = 0
+        self._sum = 0.0
+        
+        # Monotonic deques of (seq, rtt); the front holds the window's min/max
+        self._seq = 0
+        self._min_dq = deque()
+        self._max_dq = deque()
+    
+    def __len__(self):
+        return self._n
+    
+    def append(self, rtt):
+        """Add an RTT, evicting the oldest one once the window is full"""
+        # Work on locals to keep attribute lookups out of the per-ping path
+        buf, pos, size, seq = self._buf, self._pos, self.size, self._seq
+        min_dq, max_dq = self._min_dq, self._max_dq
+        
+        if self._n == size:
+            self._sum -= float(buf[pos])
+        else:
+            self._n += 1
+        buf[pos] = rtt
+        # Use the stored value so evictions cancel out exactly
+        rtt = float(buf[pos])
+        self._sum += rtt
+        self._pos = (pos + 1) % size
+        
+        # Drop extrema that have slid out of the window
+        oldest = seq - size
+        if min_dq and min_dq[0][0] <= oldest:
+            min_dq.popleft()
+        if max_dq and max_dq[0][0] <= oldest:
+            max_dq.popleft()
+        
+        entry = (seq, rtt)
+        while min_dq and min_dq[-1][1] >= rtt:
+            min_dq.pop()
+        min_dq.append(entry)
+        while max_dq and max_dq[-1][1] <= rtt:
+            max_dq.pop()
+        max_dq.append(entry)
+        self._seq = seq + 1
+    
+    def avg(self):
+        return self._sum / self._n
+    
+    def min(self):
+        return self._min_dq[0][1]
+    
+    def max(self):
+        return self._max_dq[0][1]
 
 
 class CellularMonitor:
-    def __init__(self, host, interval, timeout, interface, duration):
+    def __init__(self, host, interval, timeout, interface, duration, stats_window=100):
         self.host = host
         self.interval = interval
         self.timeout = timeout
@@ -42,28 +147,112 @@ class CellularMonitor:
         self.max_downtime = 0
         self.current_downtime = 0
         
-        # Track recent pings for statistics
-        self.recent_pings = deque(maxlen=100)
-        self.recent_failures = deque(maxlen=100)
+        # Track recent pings and failures for statistics (a window of 0 disables this)
+        self.recent_pings = RttWindow(stats_window) if stats_window else None
+        self._rtt_overall_sum = 0.0
+        self._rtt_overall_min = None
+        self._rtt_overall_max = None
+        self._fail_window = deque(maxlen=stats_window) if stats_window else None
+        self._fail_counts = Counter()
+        
+        # Raw ICMP socket bound to the interface, reused for every ping and
+        # re-opened after errors (e.g. the interface disappearing on a modem reset)
+        self._icmp_id = os.getpid() & 0xffff
+        self._icmp_sock = None
+        
+        # Selector used to wait for replies with a timeout
+        self._sel = selectors.DefaultSelector()
+        
+        # Open the socket up front so missing privileges are reported at startup;
+        # a missing interface is retried on each ping instead
+        try:
+            self.open_icmp_socket()
+        except PermissionError:
+            self._sel.close()
+            raise
+        except OSError:
+            pass
+        
+        # Echo request packet, updated in place with the sequence number and checksum
+        self._pkt = bytearray(struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self._icmp_id, 0))
+        
+        # Hostnames are resolved lazily and cached until a ping fails or the TTL expires
+        try:
+            socket.inet_aton(host)
+            self._is_ip = True
+            self._ping_target = host
+        except socket.error:
+            self._is_ip = False
+            self._ping_target = None
+        self._resolved_at = 0
+        
+        # Command lines for the diagnostic checks, built once
+        self._cmd_iflink = ("ip", "link", "show", interface)
+        self._cmd_ipaddr = ("ip", "-j", "addr", "show", interface)
+        self._cmd_route = ("ip", "route", "show", "dev", interface)
+        self._cmd_mmcli_L = ("mmcli", "-L")
+        self._cmd_mmcli_m0 = ("mmcli", "-m", "0", "--output-keyvalue")
+        self._cmd_sig_watch = ("gdbus", "monitor", "--system", "--dest", "org.freedesktop.ModemManager1")
+        
+        # Last signal strength reading, reused between failures
+        self._last_sig = "unknown"
+        self._last_sig_ts = None
+        
+        # Signal strength pushed by ModemManager, see start_signal_watch()
+        self._sig_proc = None
+        self._pushed_sig = None
+        
+        # Cached log timestamp and the second it was formatted for
+        self._ts_sec = 0
+        self._ts_str = ""
+        
+        # Log lines are queued and written out once per loop iteration
+        self._logbuf = []
         
     def log(self, level, message):
         """Log message with timestamp"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [{level:5s}] {message}")
+        # Timestamps only have second resolution, so format each second once
+        sec = int(time.time())
+        if sec != self._ts_sec:
+            self._ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+            self._ts_sec = sec
+        self._logbuf.append(f"[{self._ts_str}] [{level:5s}] {message}\n")
+    
+    def write(self, text=""):
+        """Queue an untimestamped line of output"""
+        self._logbuf.append(f"{text}\n")
+    
+    def flush_log(self):
+        """Write out all queued log lines in one go"""
+        if self._logbuf:
+            sys.stdout.write("".join(self._logbuf))
+            self._logbuf.clear()
+        sys.stdout.flush()
         
     def check_interface(self):
         """Check if the interface exists and is up"""
         try:
+            # Query netlink directly when pyroute2 is available
+            if IPRoute is not None:
+                try:
+                    index = socket.if_nametoindex(self.interface)
+                except OSError:
+                    return False, "Interface not found"
+                with IPRoute() as ipr:
+                    flags = ipr.get_links(index)[0]['flags']
+                if not flags & IFF_UP:
+                    return False, "Interface is DOWN"
+                return True, "Interface is UP"
+            
             result = subprocess.run(
-                ["ip", "link", "show", self.interface],
+                self._cmd_iflink,
                 capture_output=True,
-                text=True,
                 timeout=5
             )
             if result.returncode != 0:
                 return False, "Interface not found"
             
-            if "UP" not in result.stdout:
+            if b"UP" not in result.stdout:
                 return False, "Interface is DOWN"
             
             return True, "Interface is UP"
@@ -73,20 +262,36 @@ class CellularMonitor:
     def check_ip_config(self):
         """Check if interface has IP address"""
         try:
-            result = subprocess.run(
-                ["ip", "addr", "show", self.interface],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode != 0:
-                return False, "Could not get IP config"
-            
-            # Look for inet or inet6 addresses
-            if "inet " in result.stdout or "inet6 " in result.stdout:
-                # Extract IP addresses
-                lines = result.stdout.split('\n')
-                ips = [line.strip() for line in lines if 'inet' in line]
+            if IPRoute is not None:
+                try:
+                    index = socket.if_nametoindex(self.interface)
+                except OSError:
+                    return False, "Could not get IP config"
+                with IPRoute() as ipr:
+                    addrs = ipr.get_addr(index=index)
+                ips = [
+                    f"{'inet6' if addr['family'] == socket.AF_INET6 else 'inet'} "
+                    f"{addr.get_attr('IFA_LOCAL') or addr.get_attr('IFA_ADDRESS')}/{addr['prefixlen']}"
+                    for addr in addrs
+                    if addr['family'] in (socket.AF_INET, socket.AF_INET6)
+                ]
+            else:
+                result = subprocess.run(
+                    self._cmd_ipaddr,
+                    capture_output=True,
+                    timeout=5
+                )
+                if result.returncode != 0:
+                    return False, "Could not get IP config"
+                
+                # Look for inet or inet6 addresses
+                ips = [
+                    f"{addr['family']} {addr['local']}/{addr['prefixlen']}"
+                    for link in json.loads(result.stdout)
+                    for addr in link.get('addr_info', [])
+                    if addr.get('family') in ('inet', 'inet6')
+                ]
+            if ips:
                 return True, f"IPs: {', '.join(ips[:2])}"
             else:
                 return False, "No IP address assigned"
@@ -109,16 +314,26 @@ class CellularMonitor:
     def check_route(self):
         """Check if default route exists"""
         try:
+            if IPRoute is not None:
+                try:
+                    index = socket.if_nametoindex(self.interface)
+                except OSError:
+                    return False, "No routes for interface"
+                with IPRoute() as ipr:
+                    routes = ipr.get_routes(family=socket.AF_INET, oif=index, table=RT_TABLE_MAIN)
+                if routes:
+                    return True, f"Routes: {len(routes)} found"
+                return False, "No routes configured"
+            
             result = subprocess.run(
-                ["ip", "route", "show", "dev", self.interface],
+                self._cmd_route,
                 capture_output=True,
-                text=True,
                 timeout=5
             )
             if result.returncode != 0:
                 return False, "No routes for interface"
             
-            routes = result.stdout.strip().split('\n')
+            routes = result.stdout.strip().split(b'\n')
             if routes and routes[0]:
                 return True, f"Routes: {len(routes)} found"
             else:
@@ -130,17 +345,16 @@ class CellularMonitor:
         """Check modem status via mmcli"""
         try:
             result = subprocess.run(
-                ["mmcli", "-L"],
+                self._cmd_mmcli_L,
                 capture_output=True,
-                text=True,
                 timeout=5
             )
             if result.returncode != 0:
                 return False, "ModemManager not responding"
             
-            if "Modem" in result.stdout:
+            if b"Modem" in result.stdout:
                 # Extract modem info
-                lines = result.stdout.strip().split('\n')
+                lines = result.stdout.decode('ascii', 'replace').strip().split('\n')
                 return True, f"Modem: {lines[0] if lines else 'Found'}"
             else:
                 return False, "No modems found"
@@ -157,80 +371,164 @@ class CellularMonitor:
         except Exception as e:
             return False, str(e)
     
+    def start_signal_watch(self):
+        """Follow signal quality changes from ModemManager with one long-lived gdbus monitor"""
+        try:
+            self._sig_proc = subprocess.Popen(
+                self._cmd_sig_watch,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            return
+        
+        # Updates are only sent on change, so seed with the current value
+        self._pushed_sig = self.read_signal_strength()
+        threading.Thread(target=self._read_signal_watch, name="signal-watch", daemon=True).start()
+    
+    def _read_signal_watch(self):
+        """Record signal quality from PropertiesChanged signals as they arrive"""
+        for line in self._sig_proc.stdout:
+            m = _SIGQ_PUSH_RE.search(line)
+            if m:
+                # A reading ModemManager marks as not recent is stale; None makes
+                # get_signal_strength fall back to reading it from mmcli
+                self._pushed_sig = f"{int(m.group(1))}%" if m.group(2) == b"true" else None
+            elif _MODEM_REMOVED_RE.search(line) or _MM_NO_OWNER in line:
+                # The modem or ModemManager itself went away
+                self._pushed_sig = "unknown"
+    
+    def stop_signal_watch(self):
+        """Stop the gdbus monitor, if running"""
+        if self._sig_proc is not None:
+            self._sig_proc.terminate()
+            self._sig_proc.wait()
+            self._sig_proc = None
+    
     def get_signal_strength(self):
-        """Get current signal strength"""
+        """Get current signal strength, rate-limited to avoid forking mmcli on every failure"""
+        # Use the pushed value while the watcher is alive
+        proc = self._sig_proc
+        pushed = self._pushed_sig
+        if pushed is not None and proc is not None and proc.poll() is None:
+            return pushed
+        
+        now = time.monotonic()
+        if self._last_sig_ts is not None and now - self._last_sig_ts < SIGNAL_CACHE_TTL:
+            return self._last_sig
+        
+        # During an outage only poll on every Nth failure
+        if self.downtime_start is not None and self.failure_count % SIGNAL_OUTAGE_EVERY:
+            return self._last_sig
+        
+        self._last_sig = self.read_signal_strength()
+        self._last_sig_ts = now
+        return self._last_sig
+    
+    def read_signal_strength(self):
+        """Read signal strength from mmcli"""
         try:
             result = subprocess.run(
-                ["mmcli", "-m", "0"],
+                self._cmd_mmcli_m0,
                 capture_output=True,
-                text=True,
                 timeout=5
             )
             if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if 'signal quality' in line.lower():
-                        signal = line.split(':')[-1].strip()
-                        return signal
+                m = _SIGQ_RE.search(result.stdout)
+                if m:
+                    return f"{int(m.group(1))}%"
             return "unknown"
         except Exception:
             return "unknown"
     
+    def open_icmp_socket(self):
+        """Open the raw ICMP socket, bind it to the interface and register it for replies"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_BINDTODEVICE, self.interface.encode() + b"\0")
+        except OSError:
+            sock.close()
+            raise
+        self._sel.register(sock, selectors.EVENT_READ)
+        self._icmp_sock = sock
+    
+    def close_icmp_socket(self):
+        """Close the raw ICMP socket so the next ping opens and binds a fresh one"""
+        if self._icmp_sock is not None:
+            self._sel.unregister(self._icmp_sock)
+            self._icmp_sock.close()
+            self._icmp_sock = None
+    
     def ping_host(self):
-        """Ping the remote host"""
+        """Ping the remote host with a single ICMP echo request"""
         try:
-            # First, check if host is an IP or hostname
-            is_ip = False
-            try:
-                socket.inet_aton(self.host)
-                is_ip = True
-            except socket.error:
-                pass
+            if self._icmp_sock is None:
+                self.open_icmp_socket()
             
-            # If hostname, try to resolve it first
-            if not is_ip:
+            if not self._is_ip and (self._ping_target is None or
+                                    time.monotonic() - self._resolved_at > DNS_CACHE_TTL):
                 dns_ok, resolved_ip = self.resolve_hostname(self.host)
                 if not dns_ok:
                     return False, None, f"DNS resolution failed: {resolved_ip}"
-                ping_target = resolved_ip
-            else:
-                ping_target = self.host
+                self._ping_target = resolved_ip
+                self._resolved_at = time.monotonic()
             
-            cmd = [
-                "ping",
-                "-I", self.interface,
-                "-c", "1",
-                "-W", str(self.timeout),
-                ping_target
-            ]
+            seq = self.ping_count & 0xffff
+            packet = self._pkt
+            # Checksum is computed with its own field zeroed
+            struct.pack_into("!HHH", packet, 2, 0, self._icmp_id, seq)
+            struct.pack_into("!H", packet, 2, icmp_checksum(packet))
             
-            start = time.time()
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout + 2
-            )
-            elapsed = time.time() - start
+            start = time.monotonic()
+            deadline = start + self.timeout
+            self._icmp_sock.sendto(packet, (self._ping_target, 0))
             
-            if result.returncode == 0:
-                # Extract RTT from output
-                for line in result.stdout.split('\n'):
-                    if 'time=' in line:
-                        try:
-                            rtt = float(line.split('time=')[1].split(' ')[0])
-                            return True, rtt, None
-                        except:
-                            pass
-                return True, elapsed * 1000, None
-            else:
-                # Ping failed
-                error = result.stderr.strip() if result.stderr else "Ping failed"
-                return False, None, error
-        except subprocess.TimeoutExpired:
+            # The raw socket sees every ICMP packet, so wait for our own reply
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not self._sel.select(remaining):
+                    break
+                
+                data, _ = self._icmp_sock.recvfrom(1024)
+                elapsed = time.monotonic() - start
+                
+                # Skip the IP header to get at the ICMP header
+                ihl = (data[0] & 0x0f) * 4
+                if len(data) < ihl + 8:
+                    continue
+                icmp_type, _, _, icmp_id, icmp_seq = struct.unpack_from("!BBHHH", data, ihl)
+                if icmp_type == ICMP_ECHO_REPLY and icmp_id == self._icmp_id and icmp_seq == seq:
+                    return True, elapsed * 1000, None
+            
+            self.invalidate_ping_target()
             return False, None, "Ping timeout"
         except Exception as e:
+            self.invalidate_ping_target()
+            # Rebind on the next ping in case the interface was removed or re-created
+            if isinstance(e, OSError):
+                self.close_icmp_socket()
             return False, None, str(e)
     
+    def invalidate_ping_target(self):
+        """Force the hostname to be re-resolved on the next ping"""
+        if not self._is_ip:
+            self._ping_target = None
+    
+    def record_failure(self, error):
+        """Track a failure in the sliding window of recent failure types"""
+        if self._fail_window is None:
+            return
+        error = sys.intern(error)
+        if len(self._fail_window) == self._fail_window.maxlen:
+            evicted = self._fail_window[0]
+            self._fail_counts[evicted] -= 1
+            if not self._fail_counts[evicted]:
+                del self._fail_counts[evicted]
+        self._fail_window.append(error)
+        self._fail_counts[error] += 1
+    
     def run_diagnostics(self):
         """Run full diagnostics"""
         self.log("INFO", "Running diagnostics...")
@@ -243,16 +541,19 @@ class CellularMonitor:
             ("Modem", self.check_modem_status),
         ]
         
-        for name, check_func in checks:
-            success, message = check_func()
-            level = "OK  " if success else "FAIL"
-            self.log(level, f"{name:15s}: {message}")
+        # Run the checks concurrently, then report them in order
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = [(name, executor.submit(check_func)) for name, check_func in checks]
+            for name, future in futures:
+                success, message = future.result()
+                level = "OK  " if success else "FAIL"
+                self.log(level, f"{name:15s}: {message}")
     
     def monitor(self):
         """Main monitoring loop"""
-        self.start_time = datetime.now()
+        self.start_time = time.monotonic()
         if self.duration:
-            self.end_time = self.start_time + timedelta(minutes=self.duration)
+            self.end_time = self.start_time + self.duration * 60
         
         self.log("INFO", f"Starting cellular monitor")
         self.log("INFO", f"Host: {self.host}")
@@ -266,13 +567,17 @@ class CellularMonitor:
         
         # Initial diagnostics
         self.run_diagnostics()
+        self.start_signal_watch()
         self.log("INFO", "Starting ping loop...")
-        print()
+        self.write()
+        self.flush_log()
         
         try:
+            # Pings are scheduled on fixed ticks so ping and diagnostic time don't cause drift
+            next_tick = time.monotonic()
             while True:
                 # Check if duration exceeded
-                if self.end_time and datetime.now() >= self.end_time:
+                if self.end_time and time.monotonic() >= self.end_time:
                     self.log("INFO", "Duration exceeded, stopping")
                     break
                 
@@ -281,11 +586,17 @@ class CellularMonitor:
                 
                 if success:
                     self.success_count += 1
-                    self.recent_pings.append(rtt)
+                    if self.recent_pings is not None:
+                        self.recent_pings.append(rtt)
+                    self._rtt_overall_sum += rtt
+                    if self._rtt_overall_min is None or rtt < self._rtt_overall_min:
+                        self._rtt_overall_min = rtt
+                    if self._rtt_overall_max is None or rtt > self._rtt_overall_max:
+                        self._rtt_overall_max = rtt
                     
                     # If we were in downtime, log recovery
-                    if self.downtime_start:
-                        downtime = (datetime.now() - self.downtime_start).total_seconds()
+                    if self.downtime_start is not None:
+                        downtime = time.monotonic() - self.downtime_start
                         self.downtime_duration += downtime
                         if downtime > self.max_downtime:
                             self.max_downtime = downtime
@@ -297,30 +608,41 @@ class CellularMonitor:
                     self.log("OK  ", f"Ping #{self.ping_count}: {rtt:.1f}ms")
                 else:
                     self.failure_count += 1
-                    self.recent_failures.append(error)
+                    self.record_failure(error)
                     
                     # Get signal strength at time of failure
                     signal = self.get_signal_strength()
                     
                     # Track downtime
-                    if not self.downtime_start:
-                        self.downtime_start = datetime.now()
+                    if self.downtime_start is None:
+                        self.downtime_start = time.monotonic()
                         self.log("FAIL", f"✗ Ping loss #{self.failure_count}: {error} (Signal: {signal})")
                     else:
-                        self.current_downtime = (datetime.now() - self.downtime_start).total_seconds()
+                        self.current_downtime = time.monotonic() - self.downtime_start
                         self.log("FAIL", f"✗ Still down for {self.current_downtime:.1f}s (Losses: {self.failure_count}, Signal: {signal}): {error}")
                 
                 # Print stats every 10 pings
                 if self.ping_count % 10 == 0:
                     self.print_stats()
                 
-                time.sleep(self.interval)
+                self.flush_log()
+                
+                # Sleep until the next tick, skipping ahead on the grid past any that were missed
+                next_tick += self.interval
+                now = time.monotonic()
+                if now >= next_tick:
+                    next_tick += ((now - next_tick) // self.interval + 1) * self.interval
+                time.sleep(next_tick - now)
         
         except KeyboardInterrupt:
             self.log("INFO", "Interrupted by user")
         
         finally:
             self.print_final_stats()
+            self.flush_log()
+            self.stop_signal_watch()
+            self.close_icmp_socket()
+            self._sel.close()
     
     def print_stats(self):
         """Print current statistics"""
@@ -329,26 +651,26 @@ class CellularMonitor:
         stats = f"Stats: {self.success_count}/{self.ping_count} ({success_rate:.1f}%)"
         
         if self.recent_pings:
-            avg_rtt = sum(self.recent_pings) / len(self.recent_pings)
-            min_rtt = min(self.recent_pings)
-            max_rtt = max(self.recent_pings)
+            avg_rtt = self.recent_pings.avg()
+            min_rtt = self.recent_pings.min()
+            max_rtt = self.recent_pings.max()
             stats += f" | RTT: {avg_rtt:.1f}ms (min: {min_rtt:.1f}ms, max: {max_rtt:.1f}ms)"
         
-        if self.downtime_start:
+        if self.downtime_start is not None:
             stats += f" | DOWNTIME: {self.current_downtime:.1f}s"
         
         self.log("STAT", stats)
     
     def print_final_stats(self):
         """Print final statistics"""
-        elapsed = (datetime.now() - self.start_time).total_seconds()
+        elapsed = time.monotonic() - self.start_time
         success_rate = (self.success_count / self.ping_count * 100) if self.ping_count > 0 else 0
         loss_rate = (self.failure_count / self.ping_count * 100) if self.ping_count > 0 else 0
         
-        print()
-        print("=" * 70)
+        self.write()
+        self.write("=" * 70)
         self.log("INFO", "FINAL STATISTICS")
-        print("=" * 70)
+        self.write("=" * 70)
         
         self.log("INFO", f"Total pings: {self.ping_count}")
         self.log("INFO", f"Successful: {self.success_count}")
@@ -357,27 +679,21 @@ class CellularMonitor:
         self.log("INFO", f"Loss rate: {loss_rate:.1f}%")
         self.log("INFO", f"Total time: {elapsed:.1f}s ({elapsed/60:.1f} minutes)")
         
-        if self.recent_pings:
-            avg_rtt = sum(self.recent_pings) / len(self.recent_pings)
-            min_rtt = min(self.recent_pings)
-            max_rtt = max(self.recent_pings)
-            self.log("INFO", f"RTT - Avg: {avg_rtt:.1f}ms, Min: {min_rtt:.1f}ms, Max: {max_rtt:.1f}ms")
+        if self.success_count > 0:
+            avg_rtt = self._rtt_overall_sum / self.success_count
+            self.log("INFO", f"RTT - Avg: {avg_rtt:.1f}ms, Min: {self._rtt_overall_min:.1f}ms, Max: {self._rtt_overall_max:.1f}ms")
         
         if self.failure_count > 0:
             self.log("WARN", f"Total downtime: {self.downtime_duration:.1f}s")
             self.log("WARN", f"Max downtime episode: {self.max_downtime:.1f}s")
             self.log("WARN", f"Cumulative ping losses: {self.failure_count}")
             
-            if self.recent_failures:
-                failure_types = {}
-                for failure in self.recent_failures:
-                    failure_types[failure] = failure_types.get(failure, 0) + 1
-                
+            if self._fail_counts:
                 self.log("WARN", "Failure breakdown:")
-                for failure_type, count in sorted(failure_types.items(), key=lambda x: x[1], reverse=True):
+                for failure_type, count in self._fail_counts.most_common():
                     self.log("WARN", f"  - {failure_type}: {count} times")
         
-        print("=" * 70)
+        self.write("=" * 70)
 
 
 def main():
@@ -389,21 +705,34 @@ def main():
     parser.add_argument("--timeout", type=int, default=5, help="Ping timeout in seconds (default: 5)")
     parser.add_argument("--interface", default="wwan0", help="Network interface to use (default: wwan0)")
     parser.add_argument("--duration", type=int, default=0, help="Run for N minutes (default: 0 = infinite)")
+    parser.add_argument("--stats-window", type=int, default=100, help="Recent pings/failures kept for statistics (default: 100, 0 = off)")
     
     args = parser.parse_args()
+    if args.interval <= 0:
+        parser.error("--interval must be greater than 0")
+    if args.stats_window < 0:
+        parser.error("--stats-window must be 0 or greater")
     
-    # Check if running as root
-    if subprocess.os.geteuid() != 0:
-        print("ERROR: This script must be run as root (use sudo)")
-        sys.exit(1)
+    # Keep log lines timely when writing to a pipe (e.g. journald)
+    if not sys.stdout.isatty():
+        sys.stdout.reconfigure(line_buffering=True)
     
-    monitor = CellularMonitor(
-        host=args.host,
-        interval=args.interval,
-        timeout=args.timeout,
-        interface=args.interface,
-        duration=args.duration
-    )
+    try:
+        monitor = CellularMonitor(
+            host=args.host,
+            interval=args.interval,
+            timeout=args.timeout,
+            interface=args.interface,
+            duration=args.duration,
+            stats_window=args.stats_window
+        )
+    except OSError as e:
+        # Raw sockets need root or CAP_NET_RAW
+        if isinstance(e, PermissionError) and os.geteuid() != 0:
+            print("ERROR: This script must be run as root (use sudo) or with CAP_NET_RAW")
+        else:
+            print(f"ERROR: Could not open raw ICMP socket: {e}")
+        sys.exit(1)
     
     monitor.monitor()
 